@@ -0,0 +1,96 @@
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from concrete.readpdf import PDF_BACKENDS, DEFAULT_BACKEND, is_usable_text, select_fastest_backend
+
+# =========================================================================
+# MICRO-BENCHMARK DE BACKENDS PDF
+# Uso: python benchmark_pdf.py CP/ [otra_carpeta/ archivo.pdf ...] [--repeticiones N]
+# Compara velocidad y calidad de texto de cada backend sobre nuestro propio corpus.
+# La calidad se mide como el solapamiento de palabras (Jaccard) con el backend
+# de referencia (pypdf en modo layout, el comportamiento histórico de ReadPDF).
+# =========================================================================
+
+def collect_pdfs(paths: list[str]) -> list[Path]:
+    """Reúne los PDF indicados directamente o contenidos (recursivamente) en carpetas."""
+    pdfs = []
+    for raw_path in paths:
+        path = Path(raw_path)
+        if path.is_dir():
+            pdfs.extend(sorted(p for p in path.rglob("*") if p.suffix.lower() == ".pdf"))
+        elif path.suffix.lower() == ".pdf" and path.is_file():
+            pdfs.append(path)
+    return pdfs
+
+def word_set(text: str) -> set[str]:
+    return set(re.findall(r"\w+", text.lower()))
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def benchmark_file(pdf_path: Path, repetitions: int) -> dict:
+    """Retorna, por backend, el mejor tiempo, número de caracteres, texto y si el texto es útil."""
+    results = {}
+    for name, extract in PDF_BACKENDS.items():
+        try:
+            best_time = None
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                text = extract(pdf_path)
+                elapsed = time.perf_counter() - start
+                best_time = elapsed if best_time is None else min(best_time, elapsed)
+            results[name] = {"time": best_time, "text": text, "usable": is_usable_text(text)}
+        except Exception as e:
+            results[name] = {"error": str(e)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los backends de extracción PDF disponibles.")
+    parser.add_argument("paths", nargs="+", help="Archivos PDF o carpetas que los contengan.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por backend (se toma el mejor tiempo).")
+    args = parser.parse_args()
+
+    pdfs = collect_pdfs(args.paths)
+    if not pdfs:
+        print("No se encontraron archivos PDF para comparar.")
+        sys.exit(1)
+
+    print(f"Backends disponibles: {', '.join(PDF_BACKENDS)}")
+    print(f"Referencia de calidad: {DEFAULT_BACKEND}\n")
+
+    totals = {name: {"time": 0.0, "quality": 0.0, "usable": 0, "errors": 0} for name in PDF_BACKENDS}
+
+    for pdf_path in pdfs:
+        results = benchmark_file(pdf_path, args.repeticiones)
+        reference = word_set(results.get(DEFAULT_BACKEND, {}).get("text", ""))
+        chosen, _ = select_fastest_backend(pdf_path)
+
+        print(f"=== {pdf_path} (sonda 'auto' elige: {chosen})")
+        print(f"   {'backend':<14}{'tiempo (s)':>12}{'caracteres':>12}{'calidad':>10}{'útil':>6}")
+        for name, result in results.items():
+            if "error" in result:
+                totals[name]["errors"] += 1
+                print(f"   {name:<14}ERROR: {result['error']}")
+                continue
+            quality = jaccard(word_set(result["text"]), reference)
+            totals[name]["time"] += result["time"]
+            totals[name]["quality"] += quality
+            totals[name]["usable"] += result["usable"]
+            print(f"   {name:<14}{result['time']:>12.4f}{len(result['text']):>12}{quality:>10.2f}{'sí' if result['usable'] else 'no':>6}")
+        print()
+
+    print(f"=== RESUMEN ({len(pdfs)} documentos)")
+    print(f"   {'backend':<14}{'tiempo total':>14}{'calidad media':>15}{'útiles':>8}{'errores':>9}")
+    for name, total in totals.items():
+        ok_count = len(pdfs) - total["errors"]
+        mean_quality = total["quality"] / ok_count if ok_count else 0.0
+        print(f"   {name:<14}{total['time']:>14.4f}{mean_quality:>15.2f}{total['usable']:>8}{total['errors']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,112 @@ from ifactory.interface import ReadingInterface
 from pypdf import PdfReader
 from pathlib import Path
 
+# =========================================================================
+# BACKENDS DE EXTRACCIÓN PDF
+# Cada backend recibe la ruta del PDF y un número máximo de páginas opcional
+# (None = todas) y retorna el texto extraído. Los motores opcionales solo se
+# registran si su librería está instalada.
+# =========================================================================
+
+def _extract_pypdf(pdf_path: Path, max_pages: int | None, mode: str) -> str:
+    reader = PdfReader(pdf_path)
+    pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+    # Agregamos un salto de línea entre páginas
+    return "".join((page.extract_text(extraction_mode=mode) or "") + "\n" for page in pages)
+
+def _extract_pypdf_plain(pdf_path: Path, max_pages: int | None = None) -> str:
+    return _extract_pypdf(pdf_path, max_pages, "plain")
+
+def _extract_pypdf_layout(pdf_path: Path, max_pages: int | None = None) -> str:
+    return _extract_pypdf(pdf_path, max_pages, "layout")
+
+PDF_BACKENDS = {
+    "pypdf_plain": _extract_pypdf_plain,
+    "pypdf_layout": _extract_pypdf_layout,
+}
+
+try:
+    import pymupdf # Motor opcional (PyMuPDF), mucho más rápido en documentos con mucho texto
+
+    def _extract_pymupdf(pdf_path: Path, max_pages: int | None = None) -> str:
+        with pymupdf.open(pdf_path) as document:
+            last_page = document.page_count if max_pages is None else min(max_pages, document.page_count)
+            return "".join(document[i].get_text() + "\n" for i in range(last_page))
+
+    PDF_BACKENDS["pymupdf"] = _extract_pymupdf
+except ImportError:
+    pass
+
+try:
+    from pdfminer.high_level import extract_text as pdfminer_extract_text # Motor opcional (pdfminer.six)
+
+    def _extract_pdfminer(pdf_path: Path, max_pages: int | None = None) -> str:
+        return pdfminer_extract_text(pdf_path, maxpages=max_pages or 0)
+
+    PDF_BACKENDS["pdfminer"] = _extract_pdfminer
+except ImportError:
+    pass
+
+# Backend histórico: se usa como respaldo cuando ningún otro devuelve texto útil
+DEFAULT_BACKEND = "pypdf_layout"
+AUTO_BACKEND = "auto"
+
+# Orden de la sonda: del backend más rápido esperado al más lento.
+# El respaldo (pypdf layout) no se sondea: solo se usa si ninguno de estos sirve.
+PROBE_ORDER = ["pymupdf", "pypdf_plain", "pdfminer"]
+
+# Parámetros de la sonda heurística
+PROBE_PAGES = 2
+MIN_USABLE_CHARS = 50
+MIN_USABLE_RATIO = 0.6
+
+
+def is_usable_text(text: str) -> bool:
+    """
+    Heurística barata para decidir si un texto extraído es aprovechable:
+    debe tener un mínimo de caracteres y una proporción alta de letras,
+    dígitos y espacios (descarta texto vacío o ilegible por mala codificación).
+    """
+    stripped = text.strip()
+    if len(stripped) < MIN_USABLE_CHARS:
+        return False
+    readable = sum(1 for char in stripped if char.isalnum() or char.isspace())
+    return readable / len(stripped) >= MIN_USABLE_RATIO
+
+
+def select_fastest_backend(pdf_path: Path, probe_pages: int = PROBE_PAGES) -> tuple[str, str | None]:
+    """
+    Prueba los backends disponibles sobre las primeras páginas, del más rápido
+    esperado al más lento, y se queda con el primero que devuelve texto útil.
+
+    :return: Tupla (nombre del backend, texto de la sonda). Si ninguno sirve,
+             retorna el backend por defecto y None.
+    """
+    for name in PROBE_ORDER:
+        if name not in PDF_BACKENDS:
+            continue
+        try:
+            text = PDF_BACKENDS[name](pdf_path, probe_pages)
+        except Exception:
+            # Un backend que falla en la sonda simplemente queda descartado
+            continue
+        if is_usable_text(text):
+            return name, text
+
+    return DEFAULT_BACKEND, None
+
+
 class ReadPDF(ReadingInterface):
-   
+
+    def __init__(self, backend: str = AUTO_BACKEND):
+        """
+        :param backend: Nombre del backend de PDF_BACKENDS a utilizar, o 'auto'
+                        para elegir el más rápido por documento.
+        """
+        if backend != AUTO_BACKEND and backend not in PDF_BACKENDS:
+            raise ValueError(f"Backend PDF '{backend}' no disponible. Opciones: {', '.join(PDF_BACKENDS)}")
+        self.backend = backend
+
     def get_reading(self, file: str) -> str:
         """
         Lee el contenido de texto de todas las páginas de un archivo PDF.
@@ -12,23 +116,26 @@ class ReadPDF(ReadingInterface):
         :return: Un string que contiene el texto concatenado de todas las páginas.
         """
         pdf_path = Path(file)
-        
+
         # Verifica si el archivo existe
         if not pdf_path.is_file():
             return f"Error: El archivo no fue encontrado en la ruta {file}"
 
         try:
-            # Crear un objeto PdfReader
-            reader = PdfReader(pdf_path)
-            text = ""
-            
-            # Iterar sobre todas las páginas
-            for page in reader.pages:
-                # Extraer el texto de la página y concatenarlo
-                text += page.extract_text(extraction_mode="layout") + "\n"  # Agregamos un salto de línea entre páginas
-            
-            return text
-            
+            # Elegimos el backend (sonda sobre las primeras páginas si está en modo 'auto')
+            backend = self.backend
+            if backend == AUTO_BACKEND:
+                num_pages = len(PdfReader(pdf_path).pages)
+                backend, probe_text = select_fastest_backend(pdf_path, min(PROBE_PAGES, num_pages))
+                print(f"[{pdf_path.name}] | LOG: Backend PDF seleccionado: {backend}")
+
+                # Documento corto (lo habitual en una HU): la sonda ya extrajo todas sus páginas
+                if probe_text is not None and num_pages <= PROBE_PAGES:
+                    return probe_text
+
+            # Extraer el texto de todas las páginas con el backend elegido
+            return PDF_BACKENDS[backend](pdf_path)
+
         except Exception as e:
             # Manejo de errores durante la lectura (ej. archivo corrupto, permisos)
-            return f"Error al leer el archivo PDF {file}: {e}"
\ No newline at end of file
+            return f"Error al leer el archivo PDF {file}: {e}"
@@ -1,6 +1,8 @@
 import os
 import sys
 import asyncio
+from collections import Counter
+from datetime import datetime, timezone
 from pathlib import Path
 import httpx # Reemplazo moderno y asíncrono de 'requests'
 from requests.auth import HTTPBasicAuth # Se mantiene para la autenticación básica
@@ -17,8 +19,15 @@ try:
     from services.process_doc import ProcessDOC
     from services.email import enviar_email
     from services.iachat import send_chat
-    from services.formatxlsx import createxlsx
+    from services.validatecsv import validar_respuesta_ia
+    from services.fingerprint import agrupar_duplicados
+    from services.formatxlsx import createxlsx, createxlsx_consolidado
     from services.upload_attachment_to_jira import upload_attachment_to_jira
+    from services.resumable_download import descargar_reanudable, bytes_parciales
+    from services.scheduler import (
+        Deadline, PlazoAgotado, Trabajo, ejecutar_por_coste,
+        en_cache, en_hilo, estimar_coste_descarga, estimar_coste_documento
+    )
 except ImportError as e:
     print(f"ERROR CRÍTICO de importación: {e}. Verifique la estructura de carpetas de 'services'.")
     sys.exit(1)
@@ -31,6 +40,16 @@ JIRA_TOKEN = os.getenv('JIRA_TOKEN')
 ISSUE_KEY = os.getenv('ISSUE_KEY')
 TARGET_DIR = os.getenv('TARGET_DIR')
 ATTACHMENT_ENDPOINT = f"{JIRA_URL}/rest/api/3/issue/{ISSUE_KEY}?fields=attachment"
+# 'individual': un XLSX (y una subida) por documento | 'consolidado': un XLSX multi-hoja por incidencia
+MODO_XLSX = (os.getenv('MODO_XLSX') or 'individual').lower()
+# Presupuesto de tiempo de toda la ejecución (por defecto 5,5 h: margen bajo el límite de 6 h del runner)
+PRESUPUESTO_SEGUNDOS = float(os.getenv('PRESUPUESTO_SEGUNDOS') or 19800)
+# Número máximo de descargas / procesamientos simultáneos
+MAX_CONCURRENCIA = int(os.getenv('MAX_CONCURRENCIA') or 4)
+# Intentos por descarga (los reintentos continúan desde el último byte recibido)
+DESCARGA_REINTENTOS = int(os.getenv('DESCARGA_REINTENTOS') or 3)
+# Tiempo reservado en modo consolidado para escribir y subir el XLSX final
+RESERVA_CONSOLIDADO_SEGUNDOS = 120
 
 # Lista global para almacenar los metadatos de los adjuntos de Jira (payload)
 # Ahora no es estrictamente necesario que sea global si se maneja como retorno/parámetro.
@@ -59,45 +78,140 @@ async def fetch_jira_attachments_metadata(client: httpx.AsyncClient) -> list:
         print(f"ERROR al conectar con la API de Jira: {e}")
         sys.exit(1)
 
-async def download_single_attachment(client: httpx.AsyncClient, attachment: dict, target_dir: str) -> bool:
+def local_paths(attachments_metadata: list, target_dir: str) -> dict[str, Path]:
+    """
+    Ruta local de cada adjunto, por id de Jira. Jira admite varios adjuntos con el mismo
+    nombre (p. ej. una HU re-subida): en ese caso se antepone el id para que no se pisen.
+    """
+    repeticiones = Counter(attachment['filename'] for attachment in attachments_metadata)
+    return {
+        attachment['id']: Path(target_dir) / (
+            f"{attachment['id']}_{attachment['filename']}" if repeticiones[attachment['filename']] > 1 else attachment['filename']
+        )
+        for attachment in attachments_metadata
+    }
+
+def newest_first(attachments_metadata: list, paths: dict[str, Path]) -> list[Path]:
+    """Rutas locales de los adjuntos, del más reciente al más antiguo según el 'created' de Jira."""
+    def created(attachment: dict) -> datetime:
+        try:
+            return datetime.fromisoformat(attachment['created'])
+        except (KeyError, TypeError, ValueError):
+            return datetime.min.replace(tzinfo=timezone.utc)
+
+    return [paths[attachment['id']] for attachment in sorted(attachments_metadata, key=created, reverse=True)]
+
+async def download_single_attachment(client: httpx.AsyncClient, attachment: dict, filepath: Path, deadline: Deadline) -> bool:
     filename = attachment['filename']
     content_url = attachment['content']
-    filepath = Path(target_dir) / filename
 
     # --- FILTRO DE ARCHIVOS ---
     if "hu" not in filename.lower():
-        print(f"   -> Omitiendo '{filename}': No contiene el prefijo 'hu'.")
+        print(f"   -> Omitiendo '{filename}': No contiene el prefijo 'hu'.")
         return False
     # ---------------------------
+
+    # --- CACHÉ: el archivo ya está en disco con el tamaño esperado ---
+    if en_cache(attachment, filepath):
+        print(f"   -> En caché: {filename}")
+        return True
     
-    print(f"   -> Iniciando descarga: {filename}")
+    previous_bytes = bytes_parciales(filepath, attachment['id'], content_url, attachment.get('size'))
+    if previous_bytes:
+        print(f"   -> Reanudando descarga: {filename} (desde el byte {previous_bytes})")
+    else:
+        print(f"   -> Iniciando descarga: {filename}")
     
-    try:
-        # [MODIFICACIÓN CLAVE]: Usamos client.get() en lugar de client.stream().
-        # Esto permite que httpx gestione automáticamente la redirección 303,
-        # y la respuesta final (file_response) será la que contenga el archivo real (código 200).
-        file_response = await client.get(content_url, follow_redirects=True, timeout=None)
-        
-        # Ahora, raise_for_status() se ejecuta en la respuesta 200 OK final, o falla solo si es 4xx/5xx.
-        file_response.raise_for_status()
-        
-        # [MODIFICACIÓN CLAVE]: Guardamos todo el contenido de una vez (file_response.content).
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-        with open(filepath, 'wb') as f:
-            f.write(file_response.content)
-            
-        print(f"   -> Guardado OK: {filepath.name}")
-        return True
-        
-    except httpx.RequestError as e:
-        print(f"ERROR al descargar '{filename}': {e}")
-        return False
+    # [MODIFICACIÓN CLAVE]: Descarga en streaming a un archivo '.part' con su progreso en un sidecar.
+    # httpx sigue la redirección 303 de Jira; si la conexión se corta, los reintentos continúan
+    # con 'Range' contra la URL final (o descargan completo si el servidor no admite rangos).
+    # El tamaño final se verifica contra el 'size' de los metadatos.
+    ok = await descargar_reanudable(
+        client,
+        content_url,
+        filepath,
+        attachment['id'],
+        attachment.get('size'),
+        deadline,
+        DESCARGA_REINTENTOS
+    )
+    if ok:
+        print(f"   -> Guardado OK: {filepath.name}")
+    return ok
+
+def extract_text_workflow(filepath: Path, deadline: Deadline) -> str | None:
+    """
+    Flujo síncrono de extracción para un solo archivo (ProcessDOC).
+    Retorna el texto extraído o None.
+    Lanza PlazoAgotado si el plazo vence antes de empezar.
+    """
+    if "corrupto" in filepath.name:
+        raise ValueError("Simulación de error: Archivo corrupto detectado")
+
+    # 1. Ejecutar ProcessDOC
+    deadline.verificar(f"extracción de {filepath.name}")
+    return ProcessDOC(str(filepath)).process() or None
 
-async def process_single_file(filepath: Path) -> str | None:
+def generate_csv_workflow(filepath: Path, file_text: str, deadline: Deadline) -> str | None:
+    """
+    Flujo síncrono de generación para un solo archivo ya extraído: consulta
+    a la IA y validación/reparación del CSV.
+    Retorna el CSV canónico de 11 columnas o None.
+    Lanza PlazoAgotado si el plazo vence antes de alguna etapa.
+    """
+    # 2. Enviar a send_chat (lento por la espera a la IA)
+    deadline.verificar(f"consulta a la IA de {filepath.name}")
+    ai_text = send_chat(file_text, ISSUE_KEY, timeout=deadline.timeout())
+    if not ai_text:
+        return None
+
+    # 2.1. Validar y reparar el CSV localmente (reintento solo de las filas irreparables)
+    return validar_respuesta_ia(ai_text, ISSUE_KEY, timeout=deadline.timeout())
+
+def upload_xlsx(xlsx_path: Path | None, origen: str, deadline: Deadline) -> str | None:
+    """Sube el XLSX generado a JIRA. Retorna su nombre si la subida fue exitosa, o None."""
+    if not (xlsx_path and xlsx_path.exists()):
+        return None
+
+    # 4. Subir a JIRA (lento por I/O de red)
+    deadline.verificar(f"subida de {xlsx_path.name}")
+    success = upload_attachment_to_jira(
+        xlsx_path, 
+        ISSUE_KEY, 
+        JIRA_URL, 
+        JIRA_USER,
+        JIRA_TOKEN,
+        timeout=deadline.timeout()
+    )
+    if success:
+        print(f"  -> Flujo HU: XLSX generado y subido a JIRA para {origen}.")
+        return xlsx_path.name
+
+    print(f"  -> Flujo HU: Falló la subida a JIRA para {origen}.")
+    return None
+
+async def extract_single_file(filepath: Path, deadline: Deadline) -> str | None:
+    """Ejecuta en un hilo la extracción de texto de un archivo. Retorna el texto o None."""
+
+    def sync_extraction():
+        try:
+            return extract_text_workflow(filepath, deadline)
+        except PlazoAgotado:
+            # Se propaga para que el planificador lo cuente como cancelado
+            raise
+        except Exception as e:
+            print(f"ERROR: Falló el procesamiento del archivo {filepath.name}: {e}")
+            return None
+
+    print(f"   -> Extrayendo texto (en hilo): {filepath.name}")
+    return await en_hilo(sync_extraction)
+
+async def process_single_file(filepath: Path, file_text: str, deadline: Deadline) -> str | None:
     """
     Función que envuelve la lógica síncrona de procesamiento en un ThreadPoolExecutor.
-    Esto permite que la ejecución I/O intensiva o lenta de ProcessDOC, send_chat,
+    Esto permite que la ejecución I/O intensiva o lenta de send_chat
     y createxlsx no bloquee el bucle de eventos asíncrono.
+    Cada XLSX se sube en cuanto está listo, sin esperar al resto de archivos.
     Retorna el nombre del archivo XLSX generado o None.
     """
     
@@ -107,50 +221,139 @@ async def process_single_file(filepath: Path) -> str | None:
     def sync_processing_workflow():
         """Flujo de trabajo síncrono original para un solo archivo."""
         try:
-            if "corrupto" in filepath.name:
-                raise ValueError("Simulación de error: Archivo corrupto detectado")
-                
-            # 1. Ejecutar ProcessDOC
-            file_text = ProcessDOC(str(filepath)).process()
-            
-            if file_text:
-                # 2. Enviar a send_chat (lento por la espera a la IA)
-                ai_text = send_chat(file_text, ISSUE_KEY)
-                
-                if ai_text:
-                    target_dir_path = filepath.parent
-                    # 3. Generar archivo XLSX
-                    xlsx_path = createxlsx(ai_text, target_dir_path, ISSUE_KEY)
-                    
-                    if xlsx_path and xlsx_path.exists():
-                        # 4. Subir a JIRA (lento por I/O de red)
-                        success = upload_attachment_to_jira(
-                            xlsx_path, 
-                            ISSUE_KEY, 
-                            JIRA_URL, 
-                            JIRA_USER,
-                            JIRA_TOKEN
-                        )
-                        if success:
-                            print(f"  -> Flujo HU: XLSX generado y subido a JIRA para {filepath.name}.")
-                            return xlsx_path.name
-                        else:
-                            print(f"  -> Flujo HU: Falló la subida a JIRA para {filepath.name}.")
-            
+            csv_text = generate_csv_workflow(filepath, file_text, deadline)
+            if not csv_text:
+                return None
+
+            # 3. Generar archivo XLSX
+            deadline.verificar(f"generación del XLSX de {filepath.name}")
+            xlsx_path = createxlsx(csv_text, filepath.parent, ISSUE_KEY)
+            return upload_xlsx(xlsx_path, filepath.name, deadline)
+
+        except PlazoAgotado:
+            # Se propaga para que el planificador lo cuente como cancelado
+            raise
+        except Exception as e:
+            print(f"ERROR: Falló el procesamiento del archivo {filepath.name}: {e}")
             return None
+
+    print(f"   -> Procesando archivo (en hilo): {filepath.name}")
+    # Ejecuta el flujo síncrono en un ThreadPool y espera (si se cancela, espera a que el hilo pare)
+    return await en_hilo(sync_processing_workflow)
+
+async def generate_single_csv(filepath: Path, file_text: str, deadline: Deadline) -> str | None:
+    """Ejecuta en un hilo la generación del CSV de un archivo. Retorna el CSV o None."""
+
+    def sync_generation():
+        try:
+            return generate_csv_workflow(filepath, file_text, deadline)
+        except PlazoAgotado:
+            raise
         except Exception as e:
             print(f"ERROR: Falló el procesamiento del archivo {filepath.name}: {e}")
             return None
 
-    print(f"   -> Procesando archivo (en hilo): {filepath.name}")
-    # Ejecuta el flujo síncrono en un ThreadPool y espera
-    return await asyncio.to_thread(sync_processing_workflow)
+    print(f"   -> Procesando archivo (en hilo): {filepath.name}")
+    return await en_hilo(sync_generation)
+
+async def extract_and_group(files_to_process: list[Path], deadline: Deadline, preferred_order: list[Path]) -> tuple[list[tuple[Path, str]], dict[Path, list[Path]], list[Path]]:
+    """
+    Extrae el texto de todos los archivos (los más pequeños primero) y agrupa los
+    documentos exactos o casi duplicados por su huella de texto, para consultar
+    a la IA una sola vez por grupo. El representante de cada grupo es el primero
+    según 'preferred_order' (el adjunto más reciente: conserva las últimas ediciones).
+    Retorna (documentos representantes con su texto, {representante: duplicados}, cancelados por plazo).
+    """
+    extraction_report = await ejecutar_por_coste(
+        [
+            Trabajo(filepath.name, estimar_coste_documento(filepath), lambda fp=filepath: extract_single_file(fp, deadline), clave=filepath)
+            for filepath in files_to_process
+        ],
+        deadline,
+        MAX_CONCURRENCIA
+    )
+    extraction_report.imprimir("Extracción de texto")
+
+    # Resultados por ruta completa: dos adjuntos con el mismo nombre no se pisan
+    texts = {filepath: text for filepath, text in extraction_report.resultados.items() if text}
+    groups = agrupar_duplicados(
+        {str(filepath): text for filepath, text in texts.items()},
+        preferencia=[str(filepath) for filepath in preferred_order]
+    )
+    groups = [[Path(name) for name in group] for group in groups]
+
+    duplicados = {}
+    for representative, *duplicates in groups:
+        if duplicates:
+            duplicados[representative] = duplicates
+            print(f"   -> Duplicados de '{representative.name}' (se omiten): {', '.join(d.name for d in duplicates)}")
+
+    documentos = [(representative, texts[representative]) for representative, *_ in groups]
+    return documentos, duplicados, extraction_report.cancelados
+
+def build_processing_jobs(documentos: list[tuple[Path, str]], worker, deadline: Deadline) -> list[Trabajo]:
+    """Crea un trabajo planificable por documento, con su coste estimado (páginas)."""
+    return [
+        Trabajo(filepath.name, estimar_coste_documento(filepath), lambda fp=filepath, text=file_text: worker(fp, text, deadline), clave=filepath)
+        for filepath, file_text in documentos
+    ]
+
+async def process_issue_consolidated(documentos: list[tuple[Path, str]], target_path: Path, deadline: Deadline, duplicados: dict[Path, list[Path]]) -> tuple[list[str], list[Path]]:
+    """
+    Modo consolidado: genera los CSV de todos los documentos (los más pequeños primero) y
+    escribe UN solo XLSX multi-hoja para la incidencia, que se sube una única vez.
+    La generación se corta con margen suficiente para escribir y subir el libro con lo ya listo.
+    Retorna (nombre del XLSX subido o lista vacía, documentos cancelados por plazo).
+    """
+    generation_deadline = deadline.con_reserva(RESERVA_CONSOLIDADO_SEGUNDOS)
+    informe = await ejecutar_por_coste(
+        build_processing_jobs(documentos, generate_single_csv, generation_deadline),
+        generation_deadline,
+        MAX_CONCURRENCIA
+    )
+    informe.imprimir("Generación de casos de prueba")
+
+    csv_documents = [(filepath.name, csv_text) for filepath, csv_text in informe.resultados.items() if csv_text]
+    if not csv_documents:
+        return [], informe.cancelados
+    duplicate_names = {representative.name: [d.name for d in duplicates] for representative, duplicates in duplicados.items()}
+
+    def sync_render_and_upload():
+        try:
+            deadline.verificar(f"generación del XLSX consolidado de {ISSUE_KEY}")
+            xlsx_path = createxlsx_consolidado(csv_documents, target_path, ISSUE_KEY, duplicate_names)
+            return upload_xlsx(xlsx_path, f"{len(csv_documents)} documentos", deadline)
+        except Exception as e:
+            print(f"ERROR: Falló la generación del XLSX consolidado de {ISSUE_KEY}: {e}")
+            return None
+
+    xlsx_name = await asyncio.to_thread(sync_render_and_upload)
+    return ([xlsx_name] if xlsx_name else []), informe.cancelados
+
+async def process_issue_individual(documentos: list[tuple[Path, str]], deadline: Deadline) -> tuple[list[str], list[Path]]:
+    """
+    Modo individual: un XLSX por documento, procesando primero los más pequeños y
+    subiendo cada uno en cuanto está listo.
+    Retorna (nombres de los XLSX subidos, documentos cancelados por plazo).
+    """
+    informe = await ejecutar_por_coste(
+        build_processing_jobs(documentos, process_single_file, deadline),
+        deadline,
+        MAX_CONCURRENCIA
+    )
+    informe.imprimir("Procesamiento de archivos")
+
+    # Filtramos para obtener solo los nombres de archivos generados con éxito
+    return [name for name in informe.resultados.values() if name is not None], informe.cancelados
 
 
 async def main():
     """Función principal asíncrona que coordina todas las tareas."""
     global attachments, TARGET_DIR
 
+    # El plazo empieza a contar al arrancar: todas las etapas lo respetan
+    deadline = Deadline(PRESUPUESTO_SEGUNDOS)
+
     TARGET_DIR = os.getenv('TARGET_DIR')
     if not TARGET_DIR:
         print("ERROR: No se puede iniciar el procesamiento. TARGET_DIR está vacío.")
@@ -172,20 +375,32 @@ async def main():
 
         print(f"2. {len(attachments_metadata)} adjuntos encontrados. Descargando de forma CONCURRENTE en '{TARGET_DIR}'...")
         
-        # 2. Iniciar tareas de descarga concurrentes
-        # Creamos una lista de 'tasks' (tareas asíncronas)
-        download_tasks = [
-            download_single_attachment(client, attachment, TARGET_DIR) 
+        # 2. Planificar las descargas: primero las que están en caché y las más pequeñas.
+        #    Cada trabajo se identifica por su ruta local (única aunque se repita el nombre en Jira).
+        paths = local_paths(attachments_metadata, TARGET_DIR)
+        download_jobs = [
+            Trabajo(
+                attachment['filename'],
+                estimar_coste_descarga(
+                    attachment,
+                    paths[attachment['id']],
+                    bytes_parciales(paths[attachment['id']], attachment['id'], attachment['content'], attachment.get('size'))
+                ),
+                lambda a=attachment: download_single_attachment(client, a, paths[a['id']], deadline),
+                clave=paths[attachment['id']]
+            )
             for attachment in attachments_metadata
         ]
         
-        # Esperamos a que todas las descargas finalicen (se ejecutan en paralelo/concurrencia)
-        download_results = await asyncio.gather(*download_tasks)
-        download_count = sum(download_results) # Contamos cuántas descargas fueron exitosas
+        # Esperamos a que las descargas finalicen o a que venza el plazo
+        download_report = await ejecutar_por_coste(download_jobs, deadline, MAX_CONCURRENCIA)
+        downloaded_paths = [filepath for filepath, ok in download_report.resultados.items() if ok]
+        pendientes = list(download_report.cancelados)
         
-        print(f"3. Proceso de descarga finalizado. Total descargado: {download_count}")
+        print(f"3. Proceso de descarga finalizado. Total descargado: {len(downloaded_paths)}")
+        download_report.imprimir("Descargas")
         
-        if download_count == 0:
+        if not downloaded_paths:
              print("No se descargó ningún archivo. No hay nada que procesar.")
              return
         
@@ -195,24 +410,37 @@ async def main():
         
         print("\n4. Iniciando el procesamiento de archivos descargados de forma CONCURRENTE...")
         
-        # 1. Encontramos los archivos descargados que coincidan con el filtro 'hu'
-        files_to_process = [p for p in target_path.iterdir() if p.is_file() and 'hu' in p.name.lower()]
+        # 1. Archivos descargados correctamente (ya filtrados por 'hu')
+        files_to_process = downloaded_paths
         
-        # 2. Iniciar tareas de procesamiento concurrentes (usando ThreadPool para I/O/CPU)
-        process_tasks = [
-            process_single_file(filepath)
-            for filepath in files_to_process
-        ]
+        # 2. Extraer el texto y agrupar duplicados (mismo HU en DOCX y PDF, re-subidas con pequeños cambios)
+        documentos, duplicados, cancelados = await extract_and_group(
+            files_to_process, deadline, newest_first(attachments_metadata, paths)
+        )
+        pendientes.extend(cancelados)
         
-        # Esperamos a que todos los procesos (incluyendo IA y subida) finalicen
-        # Los resultados son los nombres de los archivos XLSX generados (o None)
-        processed_results = await asyncio.gather(*process_tasks)
+        if MODO_XLSX == 'consolidado':
+            # 3a. Modo consolidado: un único XLSX multi-hoja y una única subida por incidencia
+            archivos_procesados_xlsx, cancelados = await process_issue_consolidated(documentos, target_path, deadline, duplicados)
+        else:
+            # 3b. Modo individual: un XLSX por documento, subido en cuanto está listo
+            archivos_procesados_xlsx, cancelados = await process_issue_individual(documentos, deadline)
         
-        # Filtramos para obtener solo los nombres de archivos generados con éxito
-        archivos_procesados_xlsx = [name for name in processed_results if name is not None]
+        # Si un representante quedó cancelado, sus duplicados tampoco se procesaron
+        for filepath in cancelados:
+            pendientes.append(filepath)
+            pendientes.extend(duplicados.get(filepath, []))
+
+        # Duplicados omitidos (cubiertos por los casos de su representante): se informan aparte
+        omitidos = {representative: duplicates for representative, duplicates in duplicados.items() if representative not in pendientes}
+        omitted_paths = {filepath for duplicates in omitidos.values() for filepath in duplicates}
 
         print("5. Procesamiento de archivos adjuntos finalizado.")
         
+        # --- INFORME DE RESULTADOS PARCIALES ---
+        if pendientes:
+            print(f"   -> AVISO: Plazo agotado. {len(pendientes)} adjunto(s) sin procesar: {', '.join(p.name for p in pendientes)}")
+        
         # --- FASE 3: NOTIFICACIÓN FINAL ---
         
         archivos_procesados = list(archivos_procesados_xlsx)
@@ -221,8 +449,9 @@ async def main():
         # (Usamos la lista global 'attachments' poblada en la Fase 1)
         for attachment in attachments:
             if isinstance(attachment, dict) and 'filename' in attachment:
-                # Solo añadimos los originales que SÍ se descargaron/procesaron (los que tienen 'hu')
-                if 'hu' in attachment['filename'].lower():
+                # Solo añadimos los originales que SÍ se procesaron (con 'hu', ni pendientes ni omitidos por duplicados)
+                local_path = paths.get(attachment.get('id'))
+                if 'hu' in attachment['filename'].lower() and local_path not in pendientes and local_path not in omitted_paths:
                     archivos_procesados.append(attachment['filename'])
 
         # Eliminar duplicados si hay (p.ej., si un XLSX generado tiene el mismo nombre que un adjunto)
@@ -232,7 +461,13 @@ async def main():
         if archivos_procesados_xlsx: # Solo si se generó al menos un XLSX
             print("\n6. Enviando notificación por correo electrónico.")
             # Ejecutar la función síncrona de correo en un hilo
-            await asyncio.to_thread(enviar_email, archivos_procesados, ISSUE_KEY)
+            await asyncio.to_thread(
+                enviar_email,
+                archivos_procesados,
+                ISSUE_KEY,
+                [p.name for p in pendientes],
+                {representative.name: [d.name for d in duplicates] for representative, duplicates in omitidos.items()}
+            )
         else:
             print("\n6. No se enviará correo. No se generaron archivos XLSX.")
 
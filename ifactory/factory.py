@@ -1,7 +1,8 @@
 # En el archivo ifactory/factory.py
 
 # Importaciones del punto anterior van aquí:
-from concrete.readpdf import ReadPDF
+import os
+from concrete.readpdf import ReadPDF, AUTO_BACKEND
 from concrete.readdoc import ReadDOCX
 from concrete.readtxt import ReadTXT
 #from concrete.readxls import ReadXLS
@@ -12,13 +13,15 @@ class ReaderFactory:
     
     # El método estático no necesita una instancia de la clase para ser llamado.
     @staticmethod
-    def get_reader_object(extension: str) -> ReadingInterface:
+    def get_reader_object(extension: str, pdf_backend: str | None = None) -> ReadingInterface:
         
         extension = extension.lower() # Normalizar a minúsculas para evitar errores
         
         if extension == "pdf":
             # Creamos y retornamos una instancia de la clase ReadPDF
-            return ReadPDF()
+            # El backend se puede fijar con la variable PDF_BACKEND ('auto' elige el más rápido por documento)
+            backend = pdf_backend or os.getenv('PDF_BACKEND', AUTO_BACKEND)
+            return ReadPDF(backend)
         
         elif extension == "txt":
             # Creamos y retornamos una instancia de la clase ReadTXT
@@ -1,7 +1,7 @@
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List
+from typing import Dict, List, Optional
 import os
 
 # --- CONFIGURACIÓN NECESARIA ---
@@ -18,14 +18,44 @@ RECEIVER_EMAIL = SENDER_EMAIL #"correo_destino@ejemplo.com"
 
 # --- FUNCIÓN DE ENVÍO CORREGIDA ---
 
-def enviar_email(file_list: List[str], name_issue: str):
+def enviar_email(
+    file_list: List[str],
+    name_issue: str,
+    pendientes: Optional[List[str]] = None,
+    duplicados: Optional[Dict[str, List[str]]] = None
+):
     """
     Envía un email con la lista de nombres de archivos en el cuerpo del mensaje.
+    Si se indican adjuntos pendientes (no procesados por falta de tiempo), se listan aparte.
+    Igual con los duplicados omitidos ({documento procesado: adjuntos duplicados omitidos}).
     """
     
     # 1. CONSTRUIR LA LISTA HTML DINÁMICAMENTE
     # Genera <li><strong>nombre_archivo</strong></li> para cada archivo
     list_items = "".join([f"<li><strong>{filename}</strong></li>" for filename in file_list])
+
+    # Resultados parciales: adjuntos que quedaron sin procesar al agotarse el plazo
+    pending_html = ""
+    if pendientes:
+        pending_items = "".join([f"<li>{filename}</li>" for filename in pendientes])
+        pending_html = f"""
+        <h3 style='color:#FF8C00;'>Resultados parciales: los siguientes adjuntos no se procesaron por falta de tiempo:</h3>
+        <ul>
+            {pending_items}
+        </ul>"""
+
+    # Adjuntos omitidos por ser duplicados: sus casos de prueba son los del documento procesado
+    duplicates_html = ""
+    if duplicados:
+        duplicate_items = "".join([
+            f"<li>{filename} (duplicado de <strong>{documento}</strong>)</li>"
+            for documento, filenames in duplicados.items() for filename in filenames
+        ])
+        duplicates_html = f"""
+        <h3 style='color:#808080;'>Los siguientes adjuntos se omitieron por ser duplicados de otro documento:</h3>
+        <ul>
+            {duplicate_items}
+        </ul>"""
     
     # 2. CONFIGURACIÓN DEL MENSAJE
     print("Enviando CORREO de cierre...")
@@ -36,7 +66,7 @@ def enviar_email(file_list: List[str], name_issue: str):
         <h3 style='color:#3CB371;'>El ticket {name_issue} en JIRA se actualizo con los siguientes archivos:</h3>
         <ul>
             {list_items}
-        </ul>
+        </ul>{pending_html}{duplicates_html}
         <p>Este email confirma que los archivos '.xlsx' generados han sido subidos a la tarjeta de JIRA.</p>
         """
     
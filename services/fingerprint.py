@@ -0,0 +1,133 @@
+import os
+import re
+import hashlib
+import unicodedata
+
+# =========================================================================
+# HUELLAS DE TEXTO PARA DETECTAR DOCUMENTOS DUPLICADOS
+# Un mismo HU adjuntado como DOCX y PDF, o re-subido con pequeños cambios,
+# produce casi el mismo texto tras la extracción. Agrupamos esos documentos
+# para consultar a la IA una sola vez por grupo.
+# =========================================================================
+
+# Palabras por shingle para el SimHash
+TAMANO_SHINGLE = 3
+BITS_SIMHASH = 64
+# Distancia de Hamming máxima (sobre 64 bits) para dar dos textos por duplicados sin más
+# comprobación: solo textos prácticamente idénticos. Las HU escritas sobre la misma plantilla
+# ("Como {rol} quiero...", mismos criterios de aceptación) con historias distintas quedan a
+# ~9-11 bits, así que un umbral más alto las fusionaría. Configurable con UMBRAL_SIMHASH.
+UMBRAL_HAMMING = int(os.getenv('UMBRAL_SIMHASH') or 3)
+# Hasta esta distancia el par es solo candidato (re-subidas con ediciones, cabeceras de
+# página del PDF...) y se confirma con la similitud de Jaccard de sus shingles
+UMBRAL_HAMMING_CANDIDATO = 16
+# Similitud de Jaccard mínima de los shingles para confirmar un candidato. Configurable con UMBRAL_JACCARD.
+UMBRAL_JACCARD = float(os.getenv('UMBRAL_JACCARD') or 0.9)
+
+
+def normalizar_texto(text: str) -> str:
+    """
+    Normaliza el texto para que el formato de origen no influya en la huella:
+    minúsculas, sin tildes, sin puntuación y con los espacios colapsados.
+    """
+    sin_tildes = unicodedata.normalize('NFKD', text)
+    sin_tildes = "".join(char for char in sin_tildes if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", sin_tildes.lower()))
+
+
+def huella_exacta(texto_normalizado: str) -> str:
+    """Hash SHA-256 del texto normalizado: iguala documentos con el mismo contenido."""
+    return hashlib.sha256(texto_normalizado.encode('utf-8')).hexdigest()
+
+
+def shingles(texto_normalizado: str) -> list[str]:
+    """Secuencias de TAMANO_SHINGLE palabras consecutivas del texto."""
+    palabras = texto_normalizado.split()
+    if len(palabras) < TAMANO_SHINGLE:
+        return palabras
+    return [" ".join(palabras[i:i + TAMANO_SHINGLE]) for i in range(len(palabras) - TAMANO_SHINGLE + 1)]
+
+
+def simhash(texto_normalizado: str) -> int:
+    """
+    SimHash de 64 bits sobre shingles de palabras: textos con pequeñas
+    ediciones producen huellas a poca distancia de Hamming.
+    """
+    pesos = [0] * BITS_SIMHASH
+    for shingle in shingles(texto_normalizado):
+        valor = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=BITS_SIMHASH // 8).digest(), 'big')
+        for bit in range(BITS_SIMHASH):
+            pesos[bit] += 1 if valor >> bit & 1 else -1
+
+    return sum(1 << bit for bit, peso in enumerate(pesos) if peso > 0)
+
+
+def distancia_hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def agrupar_duplicados(
+    documentos: dict[str, str],
+    umbral: int = UMBRAL_HAMMING,
+    umbral_jaccard: float = UMBRAL_JACCARD,
+    preferencia: list[str] | None = None
+) -> list[list[str]]:
+    """
+    Agrupa los documentos exactos y casi duplicados: misma huella exacta, SimHash a
+    'umbral' bits o menos, o SimHash candidato confirmado con Jaccard de shingles >= 'umbral_jaccard'.
+
+    :param documentos: Diccionario {identificador del documento: texto extraído}.
+                       El identificador puede incluir la incidencia (ej: 'T1-1/HU_login.pdf').
+    :param umbral: Distancia de Hamming máxima del SimHash para dar dos textos por duplicados directamente.
+    :param umbral_jaccard: Similitud mínima de shingles para confirmar un candidato más lejano.
+    :param preferencia: Opcional, identificadores en orden de preferencia como representante
+                        (ej: del adjunto más reciente al más antiguo, para conservar las últimas ediciones).
+    :return: Lista de grupos; el primer elemento de cada grupo es el representante
+             (el primero según 'preferencia'; si no aparece, el documento con más texto),
+             el resto son sus duplicados.
+    """
+    nombres = sorted(documentos)
+    normalizados = {nombre: normalizar_texto(documentos[nombre]) for nombre in nombres}
+    exactas = {nombre: huella_exacta(normalizados[nombre]) for nombre in nombres}
+    simhashes = {nombre: simhash(normalizados[nombre]) for nombre in nombres}
+    conjuntos: dict[str, set[str]] = {}
+
+    def confirmado(a: str, b: str) -> bool:
+        """Comprobación real de similitud (solo para los candidatos: es más cara que el SimHash)."""
+        for nombre in (a, b):
+            if nombre not in conjuntos:
+                conjuntos[nombre] = set(shingles(normalizados[nombre]))
+        return jaccard(conjuntos[a], conjuntos[b]) >= umbral_jaccard
+
+    # Union-find sencillo: los conjuntos de documentos por ticket son pequeños
+    padre = {nombre: nombre for nombre in nombres}
+
+    def raiz(nombre: str) -> str:
+        while padre[nombre] != nombre:
+            padre[nombre] = padre[padre[nombre]]
+            nombre = padre[nombre]
+        return nombre
+
+    for i, a in enumerate(nombres):
+        for b in nombres[i + 1:]:
+            distancia = distancia_hamming(simhashes[a], simhashes[b])
+            if (exactas[a] == exactas[b] or distancia <= umbral
+                    or (distancia <= UMBRAL_HAMMING_CANDIDATO and confirmado(a, b))):
+                padre[raiz(b)] = raiz(a)
+
+    grupos: dict[str, list[str]] = {}
+    for nombre in nombres:
+        grupos.setdefault(raiz(nombre), []).append(nombre)
+
+    # Representante: el preferido por el llamador; si no, el documento con más texto (desempate por nombre)
+    orden = {nombre: posicion for posicion, nombre in enumerate(preferencia or [])}
+    return [
+        sorted(grupo, key=lambda nombre: (orden.get(nombre, len(orden)), -len(normalizados[nombre]), nombre))
+        for grupo in grupos.values()
+    ]
@@ -1,59 +1,36 @@
 import pandas as pd
-from io import StringIO
 import uuid
+import re
 from pathlib import Path
-import re # Necesario para la limpieza de texto
+from services.validatecsv import reparar_csv, COLUMNAS
 
-def createxlsx(csv_text: str, target_dir: Path, name_issue: str) -> Path:
-    """
-    Convierte el texto en formato CSV (devuelto por la IA) en un archivo XLSX 
-    usando Pandas y XlsxWriter, aplica formato, y lo guarda en el directorio especificado.
+# Nombre de la hoja en el modo individual (un XLSX por documento)
+HOJA_CASOS = 'Casos de Prueba'
+# Nombre de la hoja de resumen en el modo consolidado (un XLSX por incidencia)
+HOJA_RESUMEN = 'Resumen'
+# Excel limita los nombres de hoja a 31 caracteres y prohíbe []:*?/\
+MAX_LEN_HOJA = 31
+PATRON_CARACTERES_HOJA = re.compile(r'[\[\]:*?/\\]')
 
-    :param csv_text: El string de datos en formato CSV (obtenido de la IA).
-    :param target_dir: La ruta (Path object) donde se debe guardar el archivo XLSX.
-    :param name_issue: La clave de la incidencia (ej: T1-1).
-    :return: La ruta completa del archivo XLSX creado.
-    """
 
-    # --- 1. LIMPIEZA Y NORMALIZACIÓN DE DATOS ---
-    limpio_text = '\n'.join([line.strip() for line in csv_text.strip().split('\n') if line.strip()])
-    limpio_text = limpio_text.replace('"', '') 
-    csv_file = StringIO(limpio_text)
-
-    # --- 2. PARSEO DE DATOS (CON PANDAS) ---
-    try:
-        df = pd.read_csv(
-            csv_file, 
-            sep=';', 
-            header='infer', 
-            skipinitialspace=True, 
-            lineterminator='\n'
-        )
-        df.dropna(how='all', inplace=True)
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-
-    except Exception as e:
-        print(f"ERROR: Falló el parseo del CSV con Pandas. Revise el formato del string de la IA: {e}")
-        raise e 
-
-    # --- 3. CONSTRUCCIÓN DE LA RUTA Y ESCRITURA ---
-    unique_id = uuid.uuid4().hex[:8]
-    nombre_base = f"CP_{name_issue}_{unique_id}.xlsx"
-    ruta_guardado = target_dir / nombre_base 
-    
-    # 3.2. Definir el motor de escritura (xlsxwriter es requerido para formatear)
-    writer = pd.ExcelWriter(ruta_guardado, engine='xlsxwriter')
-    
-    # 3.3. Escribir los datos en el archivo (¡Rápido y eficiente!)
-    # NOTA: Escribimos los datos SIN formato aún
-    df.to_excel(writer, sheet_name='Casos de Prueba', index=False, startrow=1, header=False) # startrow=1, header=False
-    
-    # --- 4. APLICACIÓN DE FORMATO (CON XLSXWRITER) ---
-    
-    workbook = writer.book
-    worksheet = writer.sheets['Casos de Prueba']
-    
-    # 4.1. Definir el formato del ENCABEZADO (Fila 1)
+def _csv_a_dataframe(csv_text: str, name_issue: str) -> pd.DataFrame:
+    """Valida y repara el CSV de la IA y lo convierte en un DataFrame de 11 columnas."""
+
+    # Reparamos localmente (fences, prosa, columnas de más o de menos, ';' entre comillas)
+    # en lugar de fallar en el parseo y perder la llamada a la IA.
+    filas, rechazadas = reparar_csv(csv_text, name_issue)
+    if rechazadas:
+        print(f"AVISO: Se descartan {len(rechazadas)} fila(s) del CSV de la IA que no se pudieron reparar.")
+
+    if not filas:
+        raise ValueError("El CSV de la IA no contiene ninguna fila de casos de prueba válida.")
+    return pd.DataFrame(filas, columns=COLUMNAS)
+
+
+def _crear_formatos(workbook) -> tuple:
+    """Crea UNA sola vez los formatos del libro (se comparten entre todas las hojas)."""
+
+    # Formato del ENCABEZADO (Fila 1)
     verde_claro_hex = '#CCFFCC'
     header_format = workbook.add_format({
         'bold': True,
@@ -64,37 +41,139 @@ def createxlsx(csv_text: str, target_dir: Path, name_issue: str) -> Path:
         'text_wrap': True
     })
 
-    # 4.2. Definir el formato de los DATOS (Todo el Cuerpo) <--- ¡NUEVO FORMATO!
+    # Formato de los DATOS (Todo el Cuerpo)
     data_format = workbook.add_format({
         'align': 'center',       # Alineación horizontal: Centro
         'valign': 'vcenter',     # Alineación vertical: Centro
         'text_wrap': True        # Ajuste de texto (Wrap Text): Activado
     })
-    
-    # 4.3. Escribir el encabezado y aplicar formato
+
+    return header_format, data_format
+
+
+def _escribir_hoja(writer: pd.ExcelWriter, df: pd.DataFrame, sheet_name: str, header_format, data_format):
+    """Escribe el DataFrame en una hoja y aplica el encabezado, el ancho y el formato de columnas."""
+
+    # Escribimos los datos SIN formato aún (startrow=1, header=False: el encabezado va con formato)
+    df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=1, header=False)
+    worksheet = writer.sheets[sheet_name]
+
     for i, col_name in enumerate(df.columns):
         # Escribir el nombre del encabezado en la fila 0 (fila 1 de Excel) con su formato
-        worksheet.write(0, i, col_name, header_format) 
-        
-        # 4.4. Aplicar el formato de datos a TODAS LAS CELDAS DE LA COLUMNA
-        # El formato se aplica al rango de filas (desde la fila 1 hasta el final)
-        
-        # worksheet.set_column(col_inicio, col_fin, ancho, formato)
-        # Aplicamos el ancho de columna que ya calculaste:
+        worksheet.write(0, i, col_name, header_format)
+
+        # Ancho de columna según el contenido más largo (máximo 60)
         max_len = max(
-            df[col_name].astype(str).map(len).max(),
+            df[col_name].astype(str).map(len).max() if not df.empty else 0,
             len(col_name)
-        ) or 10 
+        ) or 10
         width = min(max_len * 1.2, 60)
-        
-        # Aplicamos el ancho y el formato de datos a TODAS LAS CELDAS (excepto el encabezado)
-        # El formato se aplicará de la fila 1 hasta la última (1048576, que es el máximo)
-        worksheet.set_column(i, i, width, data_format) 
-
-    # --- 5. CIERRE Y RETORNO ---
-    
-    writer.close()
-    
+
+        # Aplicamos el ancho y el formato de datos a TODAS LAS CELDAS de la columna
+        worksheet.set_column(i, i, width, data_format)
+
+
+def _nombre_hoja(nombre_documento: str, usados: set[str]) -> str:
+    """Genera un nombre de hoja válido y único a partir del nombre del documento."""
+    # Excel no admite nombres que empiecen o terminen en apóstrofo: se limpian DESPUÉS de recortar
+    base = PATRON_CARACTERES_HOJA.sub('_', Path(nombre_documento).stem)
+    base = base[:MAX_LEN_HOJA].strip("'") or 'Documento'
+
+    nombre, contador = base, 2
+    # Excel compara los nombres de hoja sin distinguir mayúsculas
+    while nombre.lower() in usados or nombre.lower() == HOJA_RESUMEN.lower():
+        sufijo = f"_{contador}"
+        # El recorte para el sufijo puede dejar un apóstrofo al final del nombre
+        nombre = (base[:MAX_LEN_HOJA - len(sufijo)].strip("'") or 'Documento') + sufijo
+        contador += 1
+
+    usados.add(nombre.lower())
+    return nombre
+
+
+def _ruta_xlsx(target_dir: Path, name_issue: str) -> tuple[str, Path]:
+    unique_id = uuid.uuid4().hex[:8]
+    nombre_base = f"CP_{name_issue}_{unique_id}.xlsx"
+    return nombre_base, target_dir / nombre_base
+
+
+def createxlsx(csv_text: str, target_dir: Path, name_issue: str) -> Path:
+    """
+    Convierte el texto en formato CSV (devuelto por la IA) en un archivo XLSX
+    usando Pandas y XlsxWriter, aplica formato, y lo guarda en el directorio especificado.
+
+    :param csv_text: El string de datos en formato CSV (obtenido de la IA).
+    :param target_dir: La ruta (Path object) donde se debe guardar el archivo XLSX.
+    :param name_issue: La clave de la incidencia (ej: T1-1).
+    :return: La ruta completa del archivo XLSX creado.
+    """
+
+    # --- 1. VALIDACIÓN, REPARACIÓN Y DATAFRAME ---
+    df = _csv_a_dataframe(csv_text, name_issue)
+
+    # --- 2. CONSTRUCCIÓN DE LA RUTA ---
+    nombre_base, ruta_guardado = _ruta_xlsx(target_dir, name_issue)
+
+    # --- 3. ESCRITURA Y FORMATO (xlsxwriter es requerido para formatear) ---
+    with pd.ExcelWriter(ruta_guardado, engine='xlsxwriter') as writer:
+        header_format, data_format = _crear_formatos(writer.book)
+        _escribir_hoja(writer, df, HOJA_CASOS, header_format, data_format)
+
     print(f"Archivo '{nombre_base}' creado exitosamente en: {ruta_guardado}")
-    
-    return ruta_guardado
\ No newline at end of file
+
+    return ruta_guardado
+
+
+def createxlsx_consolidado(
+    documentos: list[tuple[str, str]],
+    target_dir: Path,
+    name_issue: str,
+    duplicados: dict[str, list[str]] | None = None
+) -> Path:
+    """
+    Genera UN solo XLSX por incidencia con una hoja por documento de origen y una
+    hoja de resumen. Los formatos se crean una vez y el libro se escribe en una pasada.
+
+    :param documentos: Lista de tuplas (nombre del documento de origen, CSV devuelto por la IA).
+    :param target_dir: La ruta (Path object) donde se debe guardar el archivo XLSX.
+    :param name_issue: La clave de la incidencia (ej: T1-1).
+    :param duplicados: Opcional, {documento: duplicados omitidos} para listarlos en el resumen.
+    :return: La ruta completa del archivo XLSX creado.
+    """
+    duplicados = duplicados or {}
+
+    # --- 1. VALIDACIÓN, REPARACIÓN Y DATAFRAMES (un documento fallido no tumba al resto) ---
+    hojas = []
+    usados: set[str] = set()
+    for nombre_documento, csv_text in documentos:
+        try:
+            df = _csv_a_dataframe(csv_text, name_issue)
+        except ValueError as e:
+            print(f"AVISO: Se omite '{nombre_documento}' del libro consolidado: {e}")
+            continue
+        hojas.append((nombre_documento, _nombre_hoja(nombre_documento, usados), df))
+
+    if not hojas:
+        raise ValueError(f"Ningún documento de {name_issue} produjo casos de prueba válidos.")
+
+    resumen = pd.DataFrame(
+        [
+            (nombre_documento, hoja, len(df), ", ".join(duplicados.get(nombre_documento, [])))
+            for nombre_documento, hoja, df in hojas
+        ],
+        columns=['Documento', 'Hoja', 'Casos de Prueba', 'Duplicados Omitidos']
+    )
+
+    # --- 2. CONSTRUCCIÓN DE LA RUTA ---
+    nombre_base, ruta_guardado = _ruta_xlsx(target_dir, name_issue)
+
+    # --- 3. ESCRITURA Y FORMATO: resumen primero, luego una hoja por documento ---
+    with pd.ExcelWriter(ruta_guardado, engine='xlsxwriter') as writer:
+        header_format, data_format = _crear_formatos(writer.book)
+        _escribir_hoja(writer, resumen, HOJA_RESUMEN, header_format, data_format)
+        for _, hoja, df in hojas:
+            _escribir_hoja(writer, df, hoja, header_format, data_format)
+
+    print(f"Archivo consolidado '{nombre_base}' ({len(hojas)} documentos) creado exitosamente en: {ruta_guardado}")
+
+    return ruta_guardado
@@ -31,7 +31,52 @@ LA HISTORIA DE USUARIO ES LA SIGUIENTE:
 """
 
 # ******************************************************************
-def send_chat(text_doc: str, name_issue: str) -> str:
+# PLANTILLA DE REINTENTO DIRIGIDO: solo para las filas que no se pudieron
+# reparar localmente (ver services/validatecsv.py).
+texto_plantilla_reparacion = """
+LAS SIGUIENTES FILAS CSV ESTÁN MAL FORMADAS. REESCRÍBELAS PARA QUE CADA UNA TENGA EXACTAMENTE 11 COLUMNAS SEPARADAS POR PUNTO Y COMA (;),
+EN ESTE ORDEN: ID del Caso; Módulo/Funcionalidad; Descripción/Objetivo; Precondiciones; Pasos de Ejecución; Resultado Esperado;
+Resultado Actual (RELLENAR); Estado (NO EJECUTADO); ID del Defecto (RELLENAR); Fecha de Ejecución (RELLENAR); Recursos (RELLENAR).
+EL ID DEBE TENER EL FORMATO numero_correlativo_{issue_code}. SI UN CAMPO CONTIENE PUNTO Y COMA, ENCIÉRRALO ENTRE COMILLAS DOBLES.
+RESPONDE SOLO CON LAS FILAS CSV, SIN ENCABEZADOS NI TEXTO ADICIONAL.
+
+LAS FILAS SON LAS SIGUIENTES:
+
+"""
+
+# ******************************************************************
+def _completar(prompt_completo: str, timeout: float | None = None) -> str:
+    """Envía el prompt al modelo y retorna el texto de la respuesta (timeout en segundos, opcional)."""
+    # generamos la consulta a chatgpt
+    client = OpenAI(
+    base_url="https://openrouter.ai/api/v1",
+    api_key= os.getenv('OPENROUTER_APIKEY'),
+    )
+
+    # Solo acotamos la espera si se indicó un timeout (ej: lo que queda del plazo de la ejecución)
+    opciones = {"timeout": timeout} if timeout is not None else {}
+
+    completion = client.chat.completions.create(
+    extra_headers={
+        "HTTP-Referer": "<YOUR_SITE_URL>",
+        "X-Title": "<YOUR_SITE_NAME>",
+    },
+    extra_body={},
+    model="google/gemma-3-4b-it:free",
+    messages=[
+                {
+                    "role": "user",
+                    # Aquí pasamos el prompt completo
+                    "content": prompt_completo 
+                }
+            ],
+    **opciones
+    )
+    # la respuesta la podemos almacenar en una variable
+    return completion.choices[0].message.content
+
+# ******************************************************************
+def send_chat(text_doc: str, name_issue: str, timeout: float | None = None) -> str:
     try:
         
         # 2. CONSTRUYE EL PROMPT: Inserta el name_issue en la plantilla
@@ -44,31 +89,23 @@ def send_chat(text_doc: str, name_issue: str) -> str:
         # Ahora concatenamos la información completa
         prompt_completo = prompt_formateado + text_doc
         
-        # generamos la consulta a chatgpt
-        client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key= os.getenv('OPENROUTER_APIKEY'),
-        )
-
-        completion = client.chat.completions.create(
-        extra_headers={
-            "HTTP-Referer": "<YOUR_SITE_URL>",
-            "X-Title": "<YOUR_SITE_NAME>",
-        },
-        extra_body={},
-        model="google/gemma-3-4b-it:free",
-        messages=[
-                    {
-                        "role": "user",
-                        # Aquí pasamos el prompt completo
-                        "content": prompt_completo 
-                    }
-                ]
-        )
-        # la respuesta la podemos almacenar en una variable
-        csv_text = completion.choices[0].message.content
+        csv_text = _completar(prompt_completo, timeout)
         return csv_text
         
     except FileNotFoundError:
         # ... (código de manejo de errores omitido por brevedad)
         return ""
+
+# ******************************************************************
+def send_repair_chat(filas_rechazadas: list[str], name_issue: str, timeout: float | None = None) -> str:
+    """
+    Pide al modelo que reformatee únicamente las filas que no se pudieron reparar.
+    Es mucho más corto (y barato) que repetir la generación completa del documento.
+    """
+    try:
+        prompt_formateado = texto_plantilla_reparacion.format(issue_code=name_issue)
+        return _completar(prompt_formateado + "\n".join(filas_rechazadas), timeout)
+
+    except Exception as e:
+        print(f"ERROR: Falló el reintento de reparación del CSV para {name_issue}: {e}")
+        return ""
@@ -0,0 +1,204 @@
+import re
+import json
+import asyncio
+from pathlib import Path
+from urllib.parse import urlsplit
+import httpx
+
+from services.scheduler import Deadline
+
+# =========================================================================
+# DESCARGAS REANUDABLES (HTTP Range)
+# Mientras se descarga, los bytes van a '<id>_<archivo>.part' y el progreso a
+# '<id>_<archivo>.part.json' (offset, URL de Jira, URL final tras la redirección,
+# tamaño esperado y ETag). Se identifican por el id del adjunto: Jira admite
+# varios adjuntos con el mismo nombre y no deben compartir el parcial.
+# Un corte de conexión solo cuesta el reintento: se continúa con 'Range'
+# desde el último byte guardado en lugar de volver a bajar todo el archivo.
+# =========================================================================
+
+TAMANO_CHUNK = 1024 * 1024
+# Códigos que indican que la URL firmada de la redirección caducó o ya no es válida
+CODIGOS_URL_CADUCADA = {401, 403, 404, 410}
+# Inicio del tramo devuelto en una respuesta 206 (ej: 'bytes 1048576-2097151/5242880')
+PATRON_CONTENT_RANGE = re.compile(r'^\s*bytes\s+(\d+)-')
+
+
+def rutas_parciales(filepath: Path, attachment_id: str) -> tuple[Path, Path]:
+    """Retorna las rutas del archivo parcial y de su sidecar de progreso para un adjunto."""
+    base = f"{attachment_id}_{filepath.name}"
+    return filepath.with_name(base + '.part'), filepath.with_name(base + '.part.json')
+
+
+def bytes_parciales(filepath: Path, attachment_id: str, content_url: str, expected_size: int | None) -> int:
+    """Bytes ya guardados de una descarga interrumpida de este adjunto (0 si no hay ninguna válida)."""
+    _, sidecar_path = rutas_parciales(filepath, attachment_id)
+    return _leer_estado(sidecar_path, content_url, expected_size).get('offset', 0)
+
+
+def _leer_sidecar(sidecar_path: Path) -> dict:
+    try:
+        return json.loads(sidecar_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _leer_estado(sidecar_path: Path, content_url: str, expected_size: int | None) -> dict:
+    """
+    Progreso guardado, solo si corresponde al adjunto actual (misma URL de Jira y mismo
+    tamaño): un parcial de otra versión del archivo no se reanuda, se descarga de cero.
+    """
+    estado = _leer_sidecar(sidecar_path)
+    if estado.get('content_url') != content_url or estado.get('size') != expected_size:
+        return {}
+    return estado
+
+
+def _guardar_sidecar(sidecar_path: Path, estado: dict):
+    sidecar_path.write_text(json.dumps(estado), encoding='utf-8')
+
+
+def _limpiar_parciales(part_path: Path, sidecar_path: Path):
+    part_path.unlink(missing_ok=True)
+    sidecar_path.unlink(missing_ok=True)
+
+
+def _mismo_origen(url_a: str, url_b: str) -> bool:
+    a, b = urlsplit(url_a), urlsplit(url_b)
+    return (a.scheme, a.netloc) == (b.scheme, b.netloc)
+
+
+def _inicio_content_range(response: httpx.Response) -> int | None:
+    """Byte inicial del tramo según la cabecera Content-Range (None si falta o no se entiende)."""
+    coincidencia = PATRON_CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+async def _descargar_tramo(client: httpx.AsyncClient, content_url: str, part_path: Path, sidecar_path: Path,
+                           expected_size: int | None, deadline: Deadline) -> bool:
+    """
+    Un intento de descarga: continúa desde el offset del sidecar si existe,
+    o descarga el archivo completo si no hay progreso o el servidor ignora 'Range'.
+    Retorna False si hay que repetir el intento (URL de la redirección caducada
+    o tramo devuelto por el servidor que no empieza en el offset guardado).
+    """
+    estado = _leer_estado(sidecar_path, content_url, expected_size)
+    # Nunca más allá de lo que hay en disco (truncate rellenaría con ceros)
+    offset = min(estado.get('offset', 0), part_path.stat().st_size) if part_path.exists() else 0
+
+    # Reanudamos contra la URL final (tras la redirección 303) si la conocemos;
+    # si no, contra la URL de contenido de Jira, que vuelve a redirigir.
+    url = estado.get('url') if offset else None
+    url = url or content_url
+    # Pedimos los bytes tal cual están almacenados: con gzip/br los offsets de 'Range'
+    # se refieren al cuerpo comprimido y no a los bytes que escribimos en disco
+    headers = {'Accept-Encoding': 'identity'}
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+        if estado.get('etag'):
+            # Si el archivo cambió en el servidor, responde 200 con el archivo completo en lugar del tramo
+            headers['If-Range'] = estado['etag']
+    # Las credenciales de Jira solo se envían a Jira (httpx ya las retira al seguir redirecciones a otro dominio)
+    auth = httpx.USE_CLIENT_DEFAULT if _mismo_origen(url, content_url) else None
+
+    async with client.stream('GET', url, headers=headers, auth=auth, follow_redirects=True, timeout=deadline.timeout()) as response:
+
+        if offset and response.status_code == 416:
+            # El rango pedido empieza al final del archivo: ya estaba completo
+            return True
+
+        if offset and url != content_url and response.status_code in CODIGOS_URL_CADUCADA:
+            # La URL firmada caducó: el próximo intento vuelve a pasar por la URL de Jira (conservando el offset)
+            estado['url'] = None
+            _guardar_sidecar(sidecar_path, estado)
+            print(f"   -> URL de descarga caducada para '{part_path.stem}', se renueva.")
+            return False
+
+        response.raise_for_status()
+
+        if response.status_code == 206:
+            if _inicio_content_range(response) != offset:
+                # El tramo no empieza donde nos quedamos: añadirlo corrompería el archivo.
+                # Descartamos el parcial y el próximo intento descarga desde cero.
+                _limpiar_parciales(part_path, sidecar_path)
+                print(f"   -> Content-Range inesperado para '{part_path.stem}' "
+                      f"({response.headers.get('Content-Range')}), se descarga de nuevo completo.")
+                return False
+            # Reanudación: descartamos cualquier byte escrito después del último offset confirmado
+            with open(part_path, 'r+b') as f:
+                f.truncate(offset)
+            mode = 'ab'
+        else:
+            # 200: el servidor no admite rangos (o no había progreso) -> descarga completa desde cero
+            offset, mode = 0, 'wb'
+
+        # If-Range solo admite ETags fuertes
+        etag = response.headers.get('ETag')
+        estado = {
+            'content_url': content_url,
+            'url': str(response.url),
+            'offset': offset,
+            'size': expected_size,
+            'etag': etag if etag and not etag.startswith('W/') else None,
+        }
+        _guardar_sidecar(sidecar_path, estado)
+
+        with open(part_path, mode) as f:
+            # aiter_raw: sin decodificar Content-Encoding, así los offsets coinciden con los bytes en disco
+            async for chunk in response.aiter_raw(TAMANO_CHUNK):
+                f.write(chunk)
+                f.flush()
+                estado['offset'] += len(chunk)
+                _guardar_sidecar(sidecar_path, estado)
+
+    return True
+
+
+async def descargar_reanudable(client: httpx.AsyncClient, content_url: str, filepath: Path, attachment_id: str,
+                               expected_size: int | None, deadline: Deadline, reintentos: int) -> bool:
+    """
+    Descarga 'content_url' en 'filepath' con reintentos reanudables y verifica el
+    tamaño final contra el 'size' de los metadatos de Jira. El progreso se guarda
+    por 'attachment_id' (id del adjunto en Jira).
+
+    :return: True si el archivo quedó completo y con el tamaño esperado.
+    """
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    part_path, sidecar_path = rutas_parciales(filepath, attachment_id)
+
+    for intento in range(1, reintentos + 1):
+        deadline.verificar(f"descarga de {filepath.name}")
+        try:
+            if await _descargar_tramo(client, content_url, part_path, sidecar_path, expected_size, deadline):
+                break
+            print(f"   -> Intento {intento}/{reintentos}: se repite la descarga de '{filepath.name}'.")
+            continue
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            # Los errores del cliente no se arreglan reintentando
+            if 400 <= status < 500:
+                print(f"ERROR al descargar '{filepath.name}': HTTP {status}")
+                return False
+            print(f"   -> Intento {intento}/{reintentos} fallido para '{filepath.name}': HTTP {status}")
+        except httpx.RequestError as e:
+            print(f"   -> Intento {intento}/{reintentos} fallido para '{filepath.name}': {e} "
+                  f"({bytes_parciales(filepath, attachment_id, content_url, expected_size)} bytes conservados)")
+
+        if intento < reintentos:
+            # Espera exponencial corta, sin pasarnos del plazo
+            await asyncio.sleep(min(2 ** intento, deadline.restante()))
+    else:
+        print(f"ERROR al descargar '{filepath.name}': se agotaron los {reintentos} intentos.")
+        return False
+
+    # --- VERIFICACIÓN DE INTEGRIDAD ---
+    final_size = part_path.stat().st_size if part_path.exists() else 0
+    if expected_size is not None and final_size != expected_size:
+        print(f"ERROR al descargar '{filepath.name}': tamaño {final_size} bytes, se esperaban {expected_size}.")
+        # El parcial no es fiable: se descarta para que la próxima ejecución empiece de cero
+        _limpiar_parciales(part_path, sidecar_path)
+        return False
+
+    part_path.replace(filepath)
+    sidecar_path.unlink(missing_ok=True)
+    return True
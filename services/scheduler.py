@@ -0,0 +1,176 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Hashable
+
+# =========================================================================
+# PLANIFICADOR CON PLAZO (DEADLINE)
+# Todo el proceso corre dentro del límite de tiempo del runner de GitHub Actions.
+# Ordenamos los trabajos de menor a mayor coste para asegurar primero los
+# resultados rápidos y cancelamos limpiamente lo que no quepa en el plazo.
+# =========================================================================
+
+# Estimación de páginas para formatos sin paginación explícita (DOCX, TXT...)
+BYTES_POR_PAGINA_ESTIMADA = 50_000
+
+
+class PlazoAgotado(Exception):
+    """Se lanza cuando un trabajo intenta empezar (o continuar) con el plazo ya vencido."""
+
+
+class Deadline:
+    """Plazo absoluto de la ejecución, basado en un reloj monotónico."""
+
+    def __init__(self, presupuesto_segundos: float):
+        self.limite = time.monotonic() + presupuesto_segundos
+
+    def restante(self) -> float:
+        """Segundos que quedan hasta el plazo (nunca negativo)."""
+        return max(0.0, self.limite - time.monotonic())
+
+    def expirado(self) -> bool:
+        return self.restante() <= 0
+
+    def timeout(self, maximo: float | None = None) -> float:
+        """Timeout a usar en una llamada de red: lo que quede de plazo, acotado por 'maximo'."""
+        restante = self.restante()
+        return restante if maximo is None else min(restante, maximo)
+
+    def verificar(self, etapa: str):
+        """Lanza PlazoAgotado si el plazo venció antes de empezar la etapa indicada."""
+        if self.expirado():
+            raise PlazoAgotado(f"Plazo agotado antes de: {etapa}")
+
+    def con_reserva(self, segundos: float) -> "Deadline":
+        """Retorna un plazo anterior a este, dejando 'segundos' de reserva para etapas finales."""
+        reservado = Deadline(0)
+        reservado.limite = self.limite - segundos
+        return reservado
+
+
+class Trabajo:
+    """
+    Unidad de trabajo planificable: un nombre, un coste estimado y una fábrica de corrutinas.
+    La clave identifica el trabajo en el informe (por defecto, el nombre): debe ser única,
+    y Jira admite varios adjuntos con el mismo nombre de archivo.
+    """
+
+    def __init__(self, nombre: str, coste: float, fabrica: Callable[[], Awaitable[Any]], clave: Hashable | None = None):
+        self.nombre = nombre
+        self.coste = coste
+        self.fabrica = fabrica
+        self.clave = nombre if clave is None else clave
+
+
+class InformeEjecucion:
+    """Resultados (posiblemente parciales) de una ronda de trabajos planificados, por clave de trabajo."""
+
+    def __init__(self):
+        self.resultados: dict[Hashable, Any] = {}
+        self.fallidos: list[Hashable] = []
+        self.cancelados: list[Hashable] = []
+
+    def imprimir(self, titulo: str):
+        print(f"   -> {titulo}: {len(self.resultados)} completados, "
+              f"{len(self.fallidos)} fallidos, {len(self.cancelados)} cancelados por plazo.")
+        for clave in self.cancelados:
+            print(f"      * Cancelado por plazo: {clave}")
+
+
+def estimar_coste_documento(filepath: Path) -> float:
+    """
+    Estima el coste de procesar un documento en 'páginas': número real de páginas
+    para los PDF (lectura barata del índice) y una estimación por tamaño para el resto.
+    """
+    try:
+        if filepath.suffix.lower() == ".pdf":
+            from pypdf import PdfReader
+            return float(len(PdfReader(filepath).pages))
+    except Exception:
+        # Si no se puede leer el índice, caemos a la estimación por tamaño
+        pass
+
+    try:
+        return filepath.stat().st_size / BYTES_POR_PAGINA_ESTIMADA
+    except OSError:
+        return float("inf")
+
+
+def en_cache(attachment: dict, local_path: Path) -> bool:
+    """True si el adjunto ya está en 'local_path' con el tamaño indicado en los metadatos."""
+    size = attachment.get('size')
+    return size is not None and local_path.is_file() and local_path.stat().st_size == size
+
+
+def estimar_coste_descarga(attachment: dict, local_path: Path, bytes_previos: int = 0) -> float:
+    """
+    Coste de descargar un adjunto: los bytes que faltan según el tamaño de los metadatos
+    (descontando 'bytes_previos' de una descarga interrumpida), o 0 si ya está en disco
+    con el tamaño esperado (estado en caché).
+    """
+    if en_cache(attachment, local_path):
+        return 0.0
+    size = attachment.get('size')
+    return float(max(size - bytes_previos, 0)) if size is not None else float("inf")
+
+
+async def en_hilo(func: Callable[..., Any], *args) -> Any:
+    """
+    Ejecuta una función síncrona en un hilo (como asyncio.to_thread), pero si la tarea
+    se cancela, espera a que el hilo termine antes de decidir.
+    Un hilo no se puede interrumpir: si al terminar produjo un resultado (p. ej. el XLSX
+    ya se subió a Jira), se retorna ese resultado en lugar de perderlo; solo si el hilo
+    falló (o se detuvo por el plazo) se propaga la cancelación. Los flujos verifican el
+    plazo entre etapas, por lo que el hilo termina como mucho al acabar la etapa en curso.
+    """
+    futuro = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(futuro)
+    except asyncio.CancelledError:
+        await asyncio.wait({futuro})
+        if futuro.exception() is not None:
+            raise
+        # El trabajo sí se hizo: anulamos la cancelación y lo contamos como completado
+        asyncio.current_task().uncancel()
+        return futuro.result()
+
+
+async def ejecutar_por_coste(trabajos: list[Trabajo], deadline: Deadline, max_concurrencia: int) -> InformeEjecucion:
+    """
+    Ejecuta los trabajos de menor a mayor coste con concurrencia limitada.
+    Cuando vence el plazo, cancela los trabajos pendientes y retorna el informe parcial.
+    Los trabajos que corren en hilos deben usar en_hilo() para que la cancelación
+    espere a que el hilo termine (y conserve su resultado si llegó a producirlo).
+    """
+    informe = InformeEjecucion()
+    semaforo = asyncio.Semaphore(max(1, max_concurrencia))
+
+    async def ejecutar(trabajo: Trabajo):
+        # El semáforo atiende por orden de llegada: las tareas se crean ordenadas por coste
+        async with semaforo:
+            deadline.verificar(trabajo.nombre)
+            return await trabajo.fabrica()
+
+    ordenados = sorted(trabajos, key=lambda trabajo: trabajo.coste)
+    tareas = {asyncio.create_task(ejecutar(trabajo)): trabajo for trabajo in ordenados}
+    if not tareas:
+        return informe
+
+    _, pendientes = await asyncio.wait(tareas, timeout=deadline.restante())
+
+    # Cancelación limpia de lo que no cupo en el plazo (espera a los hilos en curso, ver en_hilo)
+    for tarea in pendientes:
+        tarea.cancel()
+    await asyncio.gather(*pendientes, return_exceptions=True)
+
+    for tarea, trabajo in tareas.items():
+        if tarea.cancelled() or isinstance(tarea.exception(), PlazoAgotado):
+            informe.cancelados.append(trabajo.clave)
+        elif tarea.exception() is not None:
+            print(f"ERROR: Falló el trabajo '{trabajo.nombre}': {tarea.exception()}")
+            informe.fallidos.append(trabajo.clave)
+        else:
+            # Incluye los trabajos cuyo hilo terminó con resultado después de vencer el plazo
+            informe.resultados[trabajo.clave] = tarea.result()
+
+    return informe
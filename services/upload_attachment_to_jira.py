@@ -9,7 +9,8 @@ def upload_attachment_to_jira(
     issue_key: str,
     jira_url: str,
     jira_user: str,
-    jira_token: str
+    jira_token: str,
+    timeout: float | None = None
 ) -> bool:
     """
     Sube un archivo como adjunto a la incidencia de Jira especificada.
@@ -19,6 +20,7 @@ def upload_attachment_to_jira(
     :param jira_url: URL base de la instancia de Jira (ej: https://tudominio.atlassian.net).
     :param jira_user: Usuario o Email para la autenticación.
     :param jira_token: Token de API para la autenticación.
+    :param timeout: Tiempo máximo de espera de la subida en segundos (None = sin límite).
     :return: True si la subida fue exitosa, False en caso contrario.
     """
     
@@ -56,7 +58,8 @@ def upload_attachment_to_jira(
             upload_url,
             auth=auth,
             files=files,
-            headers=headers
+            headers=headers,
+            timeout=timeout
         )
 
     # 5. Manejo de la respuesta
@@ -0,0 +1,268 @@
+import csv
+import re
+import unicodedata
+from io import StringIO
+
+# =========================================================================
+# VALIDACIÓN Y REPARACIÓN LOCAL DEL CSV DEVUELTO POR LA IA
+# El esquema es el de 11 columnas definido en services/iachat.texto_plantilla.
+# Reparar localmente es mucho más barato que repetir la llamada al modelo.
+# =========================================================================
+
+COLUMNAS = [
+    "ID del Caso",
+    "Módulo/Funcionalidad",
+    "Descripción/Objetivo",
+    "Precondiciones",
+    "Pasos de Ejecución",
+    "Resultado Esperado",
+    "Resultado Actual",
+    "Estado (Status)",
+    "ID del Defecto (si aplica)",
+    "Fecha de Ejecución",
+    "Recursos",
+]
+NUM_COLUMNAS = len(COLUMNAS)
+
+# Columnas 7 a 11: valores fijos que el prompt pide al modelo
+VALORES_POR_DEFECTO = ["RELLENAR", "NO EJECUTADO", "RELLENAR", "RELLENAR", "RELLENAR"]
+NUM_COLUMNAS_CONTENIDO = NUM_COLUMNAS - len(VALORES_POR_DEFECTO)
+
+# Columna donde se fusionan los campos sobrantes (los pasos suelen contener ';' sin comillas)
+COLUMNA_PASOS = COLUMNAS.index("Pasos de Ejecución")
+
+# Un ID válido tiene el formato numero_correlativo_{issue} (ej: 1_T1-1)
+PATRON_ID = re.compile(r"^\d+_\S+$")
+PATRON_FENCE = re.compile(r"^\s*```")
+
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas, sin tildes y solo letras/dígitos separados por un espacio."""
+    sin_tildes = unicodedata.normalize('NFKD', texto)
+    sin_tildes = "".join(char for char in sin_tildes if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", sin_tildes.lower()))
+
+COLUMNAS_NORMALIZADAS = [_normalizar(columna) for columna in COLUMNAS]
+
+def _es_nombre_de_columna(campo: str) -> bool:
+    """True si el campo es un nombre de columna completo o abreviado (ej: 'ID', 'Estado', 'Pasos')."""
+    campo = _normalizar(campo)
+    return bool(campo) and any(
+        columna == campo or columna.startswith(campo + " ") for columna in COLUMNAS_NORMALIZADAS
+    )
+
+def _es_encabezado(fila: list[str]) -> bool:
+    """Un encabezado es una fila donde la mayoría de los campos son nombres de columna."""
+    coincidencias = sum(1 for campo in fila if _es_nombre_de_columna(campo))
+    return coincidencias >= 3 and coincidencias * 2 > len(fila)
+
+def _es_inicio_de_caso(fila: list[str]) -> bool:
+    return bool(fila) and bool(PATRON_ID.match(fila[0].strip()))
+
+def _quitar_vacios_finales(fila: list[str]) -> list[str]:
+    """Elimina los campos vacíos del final (ej: el ';' final que añaden muchos modelos)."""
+    fila = list(fila)
+    while fila and not fila[-1]:
+        fila.pop()
+    return fila
+
+def _rellenar_por_defecto(fila: list[str]) -> list[str]:
+    """Completa hasta 11 columnas con los valores fijos y sustituye los vacíos."""
+    fila = fila + [""] * (NUM_COLUMNAS - len(fila))
+    for i, valor in enumerate(VALORES_POR_DEFECTO, start=NUM_COLUMNAS_CONTENIDO):
+        if not fila[i]:
+            fila[i] = valor
+    return fila
+
+def _dividir_filas_unidas(fila: list[str]) -> list[list[str]]:
+    """Separa varias filas que el modelo escribió en una misma línea (cortando en cada ID)."""
+    cortes = [i for i, campo in enumerate(fila) if i > 0 and PATRON_ID.match(campo.strip())]
+    if not cortes:
+        return [fila]
+    limites = [0] + cortes + [len(fila)]
+    return [fila[inicio:fin] for inicio, fin in zip(limites, limites[1:])]
+
+def _es_cola_por_defecto(cola: list[str]) -> bool:
+    """True si los campos coinciden, en orden, con los primeros valores fijos (o están vacíos)."""
+    return len(cola) <= len(VALORES_POR_DEFECTO) and all(
+        not campo or campo.upper() == valor for campo, valor in zip(cola, VALORES_POR_DEFECTO)
+    )
+
+def _fusionar_sobrantes(contenido: list[str]) -> list[str]:
+    """Reduce las columnas de contenido a 6 fusionando el exceso en la columna de pasos."""
+    exceso = len(contenido) - NUM_COLUMNAS_CONTENIDO
+    fin_pasos = COLUMNA_PASOS + exceso + 1
+    return contenido[:COLUMNA_PASOS] + ["; ".join(contenido[COLUMNA_PASOS:fin_pasos])] + contenido[fin_pasos:]
+
+def _alinear(fila: list[str]) -> list[str] | None:
+    """
+    Alinea una fila a las 11 columnas usando los valores fijos (RELLENAR / NO EJECUTADO)
+    como ancla: lo que va antes de ellos es el contenido, que debe tener al menos 6 campos
+    (los sobrantes se fusionan en 'Pasos de Ejecución').
+    Retorna None si la fila no se puede alinear sin adivinar qué columna se desplazó.
+    """
+    if len(fila) == NUM_COLUMNAS:
+        return _rellenar_por_defecto(fila)
+
+    # La cola de valores fijos más larga posible: si empezara antes, parte de ella se leería como contenido
+    for inicio_cola in range(max(0, len(fila) - len(VALORES_POR_DEFECTO)), len(fila)):
+        if _es_cola_por_defecto(fila[inicio_cola:]):
+            contenido, cola = fila[:inicio_cola], fila[inicio_cola:]
+            break
+    else:
+        # Sin valores fijos que sirvan de ancla: solo es fiable con exactamente las 6 columnas de contenido
+        contenido, cola = fila, []
+        if len(contenido) != NUM_COLUMNAS_CONTENIDO:
+            return None
+
+    if len(contenido) < NUM_COLUMNAS_CONTENIDO:
+        # Falta una columna de contenido: el resto estaría desplazado
+        return None
+
+    if len(contenido) > NUM_COLUMNAS_CONTENIDO:
+        contenido = _fusionar_sobrantes(contenido)
+    return _rellenar_por_defecto(contenido + cola)
+
+def _lineas_logicas(lineas: list[str]) -> list[list[str]]:
+    """
+    Parsea las líneas respetando las comillas. Una línea solo se une a la siguiente
+    cuando termina dentro de un campo entre comillas abierto (salto de línea dentro de comillas).
+    """
+    filas = []
+    i = 0
+    while i < len(lineas):
+        actual, j = lineas[i], i
+        while True:
+            try:
+                fila = next(csv.reader([actual], delimiter=';', skipinitialspace=True, strict=True), [])
+                break
+            except csv.Error:
+                if j + 1 >= len(lineas):
+                    # Comilla sin cerrar hasta el final: se parsea la línea original tal cual
+                    actual, j = lineas[i], i
+                    fila = next(csv.reader([actual], delimiter=';', skipinitialspace=True), [])
+                    break
+                j += 1
+                actual = f"{actual}\n{lineas[j]}"
+        filas.append([campo.strip() for campo in fila])
+        i = j + 1
+    return filas
+
+
+def reparar_csv(csv_text: str, name_issue: str, primer_id: int = 1) -> tuple[list[list[str]], list[str]]:
+    """
+    Valida y repara el CSV devuelto por la IA para que cada fila tenga las 11 columnas.
+
+    - Elimina los bloques ``` y el texto en prosa alrededor del CSV, y los encabezados.
+    - Respeta los campos entre comillas (incluidos ';' y saltos de línea dentro de comillas).
+    - Ignora los ';' finales sobrantes.
+    - Une las filas partidas a las que les faltan columnas de contenido y separa las filas unidas en una sola.
+    - Alinea las filas que no tienen 11 campos con los valores fijos como ancla: fusiona los campos
+      sobrantes en 'Pasos de Ejecución' y rellena los valores RELLENAR / NO EJECUTADO. Las filas
+      que no se pueden alinear se rechazan en lugar de escribirse desplazadas.
+    - Descarta como prosa las líneas sin ID y con menos columnas que las de contenido
+      (incluidos los restos de columnas fijas de una fila partida): no se reintentan con la IA.
+
+    :param csv_text: El string de datos en formato CSV (obtenido de la IA).
+    :param name_issue: La clave de la incidencia (ej: T1-1), usada para IDs faltantes.
+    :param primer_id: Número correlativo a partir del cual se generan los IDs faltantes.
+    :return: Tupla (filas reparadas de 11 columnas, líneas originales que no se pudieron reparar).
+    """
+
+    # --- 1. LIMPIEZA: fuera fences y líneas vacías ---
+    lineas = [line.strip() for line in csv_text.strip().split('\n')]
+    lineas = [line for line in lineas if line and not PATRON_FENCE.match(line)]
+
+    # --- 2. PARSEO RESPETANDO COMILLAS ---
+    filas_parseadas = _lineas_logicas(lineas)
+
+    filas: list[list[str]] = []
+    rechazadas: list[str] = []
+    pendiente: list[str] | None = None
+
+    def cerrar_pendiente():
+        nonlocal pendiente
+        if pendiente is None:
+            return
+        fila, pendiente = _quitar_vacios_finales(pendiente), None
+
+        alineada = _alinear(fila)
+        if alineada is not None:
+            filas.append(alineada)
+        else:
+            # No sabemos alinear la fila: se descarta (o se reintenta solo esta fila con la IA)
+            rechazadas.append(';'.join(fila))
+
+    # --- 3. RECONSTRUCCIÓN DE FILAS ---
+    for fila_parseada in filas_parseadas:
+        fila_parseada = _quitar_vacios_finales(fila_parseada)
+        if not fila_parseada or _es_encabezado(fila_parseada):
+            continue
+
+        for fila in _dividir_filas_unidas(fila_parseada):
+            fila = _quitar_vacios_finales(fila)
+            if not fila:
+                continue
+
+            if _es_inicio_de_caso(fila):
+                # Empieza un caso nuevo (ID reconocible): cerramos el anterior
+                cerrar_pendiente()
+                pendiente = fila
+            elif pendiente is not None and len(pendiente) < NUM_COLUMNAS_CONTENIDO:
+                # Continuación de una fila partida a la que aún le faltan columnas de contenido,
+                # tenga la línea siguiente las columnas que tenga
+                pendiente[-1] = f"{pendiente[-1]} {fila[0]}".strip()
+                pendiente.extend(fila[1:])
+            elif len(fila) >= NUM_COLUMNAS_CONTENIDO:
+                # Caso nuevo sin ID (se genera en el paso 4): cerramos el anterior
+                cerrar_pendiente()
+                pendiente = fila
+            else:
+                # Prosa (aunque tenga ';') o restos de columnas fijas de una fila partida: se descarta
+                continue
+
+    cerrar_pendiente()
+
+    # --- 4. IDS FALTANTES ---
+    for numero, fila in enumerate(filas, start=primer_id):
+        if not fila[0]:
+            fila[0] = f"{numero}_{name_issue}"
+        elif fila[0].isdigit():
+            # El modelo escribió solo el correlativo (ej: "3" -> "3_T1-1")
+            fila[0] = f"{fila[0]}_{name_issue}"
+
+    return filas, rechazadas
+
+
+def filas_a_csv(filas: list[list[str]]) -> str:
+    """Serializa las filas reparadas en CSV canónico (';', comillas solo donde hacen falta) con encabezado."""
+    salida = StringIO()
+    escritor = csv.writer(salida, delimiter=';', lineterminator='\n')
+    escritor.writerow(COLUMNAS)
+    escritor.writerows(filas)
+    return salida.getvalue()
+
+
+def validar_respuesta_ia(csv_text: str, name_issue: str, timeout: float | None = None) -> str:
+    """
+    Repara la respuesta de la IA y, solo si quedan filas irreparables,
+    pide al modelo que reformatee únicamente esas filas (un reintento dirigido).
+    El reintento se omite si el timeout indicado ya está agotado.
+
+    :return: El CSV canónico de 11 columnas, listo para createxlsx.
+    """
+    filas, rechazadas = reparar_csv(csv_text, name_issue)
+
+    if rechazadas and (timeout is None or timeout > 0):
+        print(f"  -> CSV IA: {len(rechazadas)} fila(s) irreparables para {name_issue}. Reintentando solo esas filas.")
+        # Importación diferida: evita cargar el cliente de la IA cuando la reparación local basta
+        from services.iachat import send_repair_chat
+
+        texto_reintento = send_repair_chat(rechazadas, name_issue, timeout)
+        if texto_reintento:
+            filas_reintento, aun_rechazadas = reparar_csv(texto_reintento, name_issue, primer_id=len(filas) + 1)
+            filas.extend(filas_reintento)
+            if aun_rechazadas:
+                print(f"  -> CSV IA: Se descartan {len(aun_rechazadas)} fila(s) tras el reintento.")
+
+    return filas_a_csv(filas)